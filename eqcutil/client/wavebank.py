@@ -11,15 +11,33 @@
     see: https://github.com/niosh-mining/obsplus
 """
 
-import os, glob
+import os, glob, logging, queue, threading, fnmatch
+from functools import lru_cache
 from pathlib import Path
-from obspy import read
+from obspy import read, Stream
+from obspy.io.mseed.util import get_record_information
 from obsplus import WaveBank
 
+Logger = logging.getLogger(__name__)
+
+# Sentinel object readers place on the output queue when the
+# input file iterator is exhausted
+_DONE = object()
+
 def initialize_wavebank(mseed_files=[],
                         base_path=os.path.join('.','WaveBank'),
                         path_structure='{year}',
                         name_structure='{seedid}.{time}',
+                        batch_size=50,
+                        max_workers=None,
+                        queue_size=None,
+                        skip_existing=False,
+                        index_only=False,
+                        file_format='MSEED',
+                        merge_method=-1,
+                        source_dir=None,
+                        pattern='*.mseed',
+                        defer_index=True,
                         **kwargs):
     """Helper script for initializing a :class:`~obsplus.bank.wavebank.WaveBank`
     on a local machine and loading in a list of mimiseed files
@@ -40,26 +58,440 @@ def initialize_wavebank(mseed_files=[],
     :param name_structure: file naming format for waveform files
         populated within the WaveBank , defaults to '{seedid}.{time}'
     :type name_structure: str, optional
+    :param batch_size: number of files to accumulate into a single
+        :class:`~obspy.core.stream.Stream` before each call of
+        :meth:`~obsplus.bank.wavebank.WaveBank.put_waveforms`,
+        defaults to 50. Batching bounds peak memory while still
+        collapsing per-file index/metadata updates into one update
+        per batch.
+    :type batch_size: int, optional
+    :param max_workers: number of reader threads used to parse each
+        batch of files, defaults to None, which resolves as
+        min(8, os.cpu_count()). File reads are I/O bound and obspy's
+        miniSEED reader releases the GIL in C code, so threads scale
+        with available disk parallelism. Tune per storage backend.
+    :type max_workers: int, optional
+    :param queue_size: maximum number of in-flight streams held between
+        the reader threads and the writer, defaults to None, which
+        resolves as 2*max_workers. Bounds peak memory regardless of the
+        number of input files.
+    :type queue_size: int, optional
+    :param skip_existing: consult the WaveBank index before reading and
+        skip files whose SEED ID / time coverage is already present,
+        defaults to False. Adds one cheap header-only parse per file
+        but avoids the full decode + write for previously ingested
+        files on re-runs.
+    :type skip_existing: bool, optional
+    :param index_only: only (re)build the bank index rather than copying
+        sample data into the bank, defaults to False. Files outside
+        **base_path** are symlinked into the bank root, then a single
+        :meth:`~obsplus.bank.wavebank.WaveBank.update_index` call lets
+        obsplus scan headers itself - no sample data are ever decoded.
+    :type index_only: bool, optional
+    :param file_format: file format passed to :meth:`~obspy.read` calls,
+        defaults to 'MSEED'. Passing the format explicitly bypasses
+        obspy's format-autodetection loop, which opens and sniffs each
+        file. Set to None to restore autodetection for non-miniSEED
+        inputs.
+    :type file_format: str or None, optional
+    :param merge_method: **method** passed to
+        :meth:`~obspy.core.stream.Stream.merge` on each batch before it
+        is written, defaults to -1 (concatenate adjacent same-ID
+        segments only - no interpolation or gap filling). Gappy
+        miniSEED can otherwise fan out into thousands of tiny traces,
+        each becoming its own HDF5 dataset in the bank. Set to None to
+        disable merging.
+    :type merge_method: int or None, optional
+    :param source_dir: directory to import waveform files from in place
+        of an explicit **mseed_files** list, defaults to None. The
+        directory is walked lazily with :meth:`~os.scandir` (whose
+        DirEntry objects cache stat data), so the file list is never
+        materialized in full.
+    :type source_dir: str, optional
+    :param pattern: Unix wildcard pattern files in **source_dir** must
+        match, defaults to '*.mseed'. Only used when **source_dir** is
+        set.
+    :type pattern: str, optional
+    :param defer_index: defer bank index updates until all batches are
+        written, defaults to True. Each put_waveforms call is made with
+        update_index=False and a single
+        :meth:`~obsplus.bank.wavebank.WaveBank.update_index` call runs
+        at the end, coalescing per-batch index rewrites into one.
+    :type defer_index: bool, optional
     :return: wbank - established wavebank client
     :rtype: obsplus.bank.wavebank.WaveBank
     """
-    if not os.path.exists(base_path):
-        os.makedirs(base_path)
+    # Resolve base_path once so obsplus does not re-stringify a relative
+    # path on every put_waveforms call; mkdir replaces the exists-check +
+    # makedirs pair with a single race-free call
+    base_path = Path(base_path).resolve()
+    base_path.mkdir(parents=True, exist_ok=True)
 
-    wbank = WaveBank(base_path=base_path,
+    wbank = WaveBank(base_path=str(base_path),
                      path_structure=path_structure,
                      name_structure=name_structure,
                      **kwargs)
-    
-    for msfile in mseed_files:
-        st = read(msfile)
-        wbank.put_waveforms(st)
+
+    # When the input file count is known, hint the expected index size
+    # so pytables can allocate the HDF5 table up front instead of
+    # growing it incrementally during bulk ingestion
+    try:
+        n_files = len(mseed_files)
+    except TypeError:
+        n_files = 0
+    if n_files > 0:
+        _hint_index_size(wbank, n_files)
+
+    # If a source directory is given, scan it lazily rather than
+    # requiring callers to glob + sort an explicit file list
+    if source_dir is not None:
+        if len(mseed_files) > 0:
+            Logger.warning('both mseed_files and source_dir provided - using source_dir')
+        mseed_files = _scan_source_dir(source_dir, pattern)
+
+    if max_workers is None:
+        max_workers = min(8, os.cpu_count())
+    if queue_size is None:
+        queue_size = 2 * max_workers
+
+    # If only the index is needed, link external files into the bank and
+    # let obsplus scan headers itself - no sample data decoding
+    if index_only:
+        _link_into_bank(mseed_files, base_path)
+        wbank.update_index()
+        return wbank
+
+    # If requested, snapshot the current index coverage so readers can
+    # skip files whose contents are already in the bank
+    coverage = None
+    if skip_existing:
+        wbank.update_index()
+        coverage = _index_coverage(wbank.read_index())
+
+    # Producer/consumer pipeline: reader threads pull file names off a
+    # shared iterator and push parsed streams onto a bounded queue; the
+    # main thread drains the queue into batched put_waveforms calls.
+    # The bounded queue caps in-flight streams so memory stays flat no
+    # matter how many files are ingested, while writes stay serialized
+    # since obsplus WaveBank index updates are not thread-safe.
+    file_iter = iter(mseed_files)
+    iter_lock = threading.Lock()
+    out_queue = queue.Queue(maxsize=queue_size)
+
+    readers = []
+    for _ in range(max_workers):
+        thread = threading.Thread(target=_reader,
+                                  args=(file_iter, iter_lock, out_queue, coverage,
+                                        file_format),
+                                  daemon=True)
+        thread.start()
+        readers.append(thread)
+
+    # Drain the queue into batched writes on the main thread
+    batch = Stream()
+    batch_files = []
+    finished = 0
+    reader_error = None
+    while finished < len(readers):
+        item = out_queue.get()
+        if item is _DONE:
+            finished += 1
+            continue
+        if isinstance(item, BaseException):
+            # A reader died outside its per-file handling - keep
+            # draining so the remaining readers can finish, then
+            # re-raise below
+            if reader_error is None:
+                reader_error = item
+            continue
+        msfile, st = item
+        if st is None:
+            continue
+        batch += st
+        batch_files.append(msfile)
+        if len(batch_files) >= batch_size:
+            _put_batch(wbank, batch, batch_files, file_format=file_format,
+                       merge_method=merge_method, update_index=not defer_index)
+            batch = Stream()
+            batch_files = []
+    # Flush any remaining partial batch
+    if len(batch_files) > 0:
+        _put_batch(wbank, batch, batch_files, file_format=file_format,
+                   merge_method=merge_method, update_index=not defer_index)
+
+    for thread in readers:
+        thread.join()
+    if reader_error is not None:
+        raise reader_error
+    # Run the single deferred index update
+    if defer_index:
+        wbank.update_index()
     return wbank
 
 
+def _reader(file_iter, iter_lock, out_queue, coverage=None, file_format='MSEED'):
+    """PRIVATE METHOD
+
+    Reader-thread worker for :meth:`~.initialize_wavebank`. Pops file
+    names off a shared iterator and pushes (filename, stream) tuples
+    onto a bounded output queue, ending with a sentinel once the
+    iterator is exhausted
+
+    :param file_iter: shared iterator of waveform file names
+    :type file_iter: iterator
+    :param iter_lock: lock guarding access to **file_iter**
+    :type iter_lock: threading.Lock
+    :param out_queue: bounded queue to push parsed streams onto
+    :type out_queue: queue.Queue
+    :param coverage: index coverage snapshot from :meth:`~._index_coverage`
+        used to skip already-ingested files, defaults to None (no skipping)
+    :type coverage: dict or None, optional
+    :param file_format: explicit file format for :meth:`~obspy.read`,
+        defaults to 'MSEED'. None restores format autodetection.
+    :type file_format: str or None, optional
+    """
+    try:
+        while True:
+            with iter_lock:
+                msfile = next(file_iter, None)
+            if msfile is None:
+                break
+            if coverage is not None and _is_covered(msfile, coverage, file_format=file_format):
+                Logger.debug(f'{msfile} already covered by the WaveBank index - skipping')
+                continue
+            try:
+                st = read(msfile, format=file_format)
+            except Exception as e:
+                Logger.warning(f'failed to read {msfile} ({e}) - skipping')
+                st = None
+            out_queue.put((msfile, st))
+    except BaseException as e:
+        # Surface iterator failures (e.g. a bad source_dir raising from
+        # the lazy directory scan) to the drain loop for re-raising
+        Logger.exception(f'reader thread failed: {e}')
+        out_queue.put(e)
+    finally:
+        # The sentinel must always be posted - without it the drain
+        # loop blocks forever waiting on this reader
+        out_queue.put(_DONE)
+
+
+def _hint_index_size(wbank, n_files, traces_per_file=3):
+    """PRIVATE METHOD
+
+    Hint the expected HDF5 index row count to the wavebank so pytables
+    can pre-size the index table rather than resizing it incrementally.
+    obsplus does not expose the pytables write kwargs on all versions,
+    so the hint is applied defensively and silently skipped where
+    unsupported
+
+    :param wbank: wavebank client to hint
+    :type wbank: obsplus.bank.wavebank.WaveBank
+    :param n_files: number of input waveform files
+    :type n_files: int
+    :param traces_per_file: heuristic trace count per file, defaults
+        to 3 (one per component for typical 3-component day files)
+    :type traces_per_file: int, optional
+    """
+    expectedrows = n_files * traces_per_file
+    hdf_kwargs = getattr(wbank, 'hdf_kwargs', None)
+    if isinstance(hdf_kwargs, dict):
+        hdf_kwargs.setdefault('expectedrows', expectedrows)
+    else:
+        Logger.debug('wavebank does not expose pytables write kwargs - '
+                     'skipping index pre-sizing hint')
+
+
+def _scan_source_dir(source_dir, pattern):
+    """PRIVATE METHOD
+
+    Lazily yield waveform file names from a directory using
+    :meth:`~os.scandir`, filtering on a Unix wildcard pattern.
+    DirEntry.is_file() uses the stat data scandir already fetched,
+    so no extra stat call is made per entry
+
+    :param source_dir: directory to scan
+    :type source_dir: str
+    :param pattern: Unix wildcard pattern file names must match
+    :type pattern: str
+    :return: generator of file paths
+    :rtype: generator
+    """
+    with os.scandir(source_dir) as entries:
+        for entry in entries:
+            if fnmatch.fnmatch(entry.name, pattern) and entry.is_file():
+                yield entry.path
+
+
+def _link_into_bank(mseed_files, base_path):
+    """PRIVATE METHOD
+
+    Ensure waveform files live under the bank root directory so that
+    :meth:`~obsplus.bank.wavebank.WaveBank.update_index` can find them,
+    symlinking any files that live elsewhere
+
+    :param mseed_files: waveform file names
+    :type mseed_files: iterable
+    :param base_path: root directory of the WaveBank
+    :type base_path: str
+    """
+    bank_root = os.path.abspath(base_path)
+    for msfile in mseed_files:
+        source = os.path.abspath(msfile)
+        if os.path.commonpath([source, bank_root]) == bank_root:
+            continue
+        dest = os.path.join(bank_root, os.path.basename(source))
+        if os.path.lexists(dest):
+            Logger.debug(f'{dest} already exists - skipping link')
+            continue
+        os.symlink(source, dest)
+
+
+def _index_coverage(idx):
+    """PRIVATE METHOD
+
+    Summarize a WaveBank index dataframe as a dictionary of time spans
+    keyed by SEED channel ID for quick coverage lookups
+
+    :param idx: index dataframe from :meth:`~obsplus.bank.wavebank.WaveBank.read_index`
+    :type idx: pandas.DataFrame
+    :return: coverage - {seed_id: [(starttime, endtime), ...]} with times
+        as POSIX timestamps
+    :rtype: dict
+    """
+    coverage = {}
+    for row in idx.itertuples():
+        seed_id = f'{row.network}.{row.station}.{row.location}.{row.channel}'
+        span = (row.starttime.timestamp(), row.endtime.timestamp())
+        coverage.setdefault(seed_id, []).append(span)
+    return coverage
+
+
+def _is_covered(msfile, coverage, file_format='MSEED'):
+    """PRIVATE METHOD
+
+    Check if every trace in a waveform file falls within the time spans
+    already indexed by the WaveBank, using a cheap header-only parse
+
+    :param msfile: waveform file name
+    :type msfile: str
+    :param coverage: coverage dictionary from :meth:`~._index_coverage`
+    :type coverage: dict
+    :param file_format: explicit file format for :meth:`~obspy.read`,
+        defaults to 'MSEED'. None restores format autodetection.
+    :type file_format: str or None, optional
+    :return: True if all traces are already covered, False otherwise
+    :rtype: bool
+    """
+    # For miniSEED, walk the raw record headers directly - this skips
+    # Stream/Trace object assembly entirely
+    if file_format == 'MSEED':
+        try:
+            file_spans = _scan_mseed_records(msfile)
+        except Exception:
+            file_spans = None
+    else:
+        file_spans = None
+    # Fall back to a header-only obspy read for non-miniSEED (or
+    # unparseable) files
+    if file_spans is None:
+        try:
+            hdr = read(msfile, headonly=True, format=file_format)
+        except Exception:
+            return False
+        file_spans = {}
+        for tr in hdr:
+            t0 = tr.stats.starttime.timestamp
+            t1 = tr.stats.endtime.timestamp
+            old = file_spans.get(tr.id)
+            if old is None:
+                file_spans[tr.id] = (t0, t1)
+            else:
+                file_spans[tr.id] = (min(old[0], t0), max(old[1], t1))
+    if len(file_spans) == 0:
+        return False
+    for seed_id, (t0, t1) in file_spans.items():
+        spans = coverage.get(seed_id, [])
+        if not any(s <= t0 and t1 <= e for s, e in spans):
+            return False
+    return True
+
+
+def _scan_mseed_records(msfile):
+    """PRIVATE METHOD
+
+    Enumerate the records of a miniSEED file directly with
+    :meth:`~obspy.io.mseed.util.get_record_information`, accumulating
+    the time span covered by each SEED channel ID without constructing
+    any :class:`~obspy.core.trace.Trace` objects
+
+    :param msfile: miniSEED file name
+    :type msfile: str
+    :return: spans - {seed_id: (starttime, endtime)} with times as
+        POSIX timestamps
+    :rtype: dict
+    """
+    spans = {}
+    fsize = os.path.getsize(msfile)
+    offset = 0
+    while offset < fsize:
+        info = get_record_information(msfile, offset=offset)
+        seed_id = '{0}.{1}.{2}.{3}'.format(
+            info['network'], info['station'], info['location'], info['channel'])
+        t0 = info['starttime'].timestamp
+        t1 = info['endtime'].timestamp
+        old = spans.get(seed_id)
+        if old is None:
+            spans[seed_id] = (t0, t1)
+        else:
+            spans[seed_id] = (min(old[0], t0), max(old[1], t1))
+        offset += info['record_length']
+    return spans
+
+
+def _put_batch(wbank, batch, batch_files, file_format='MSEED', merge_method=-1,
+               update_index=True):
+    """PRIVATE METHOD
+
+    Write a batched stream to **wbank** with a single
+    :meth:`~obsplus.bank.wavebank.WaveBank.put_waveforms` call,
+    falling back to per-file insertion if the batched write raises
+
+    :param wbank: wavebank client to write to
+    :type wbank: obsplus.bank.wavebank.WaveBank
+    :param batch: accumulated waveform data for this batch
+    :type batch: obspy.core.stream.Stream
+    :param batch_files: source file names for this batch (used for fallback)
+    :type batch_files: list
+    :param file_format: explicit file format for :meth:`~obspy.read`,
+        defaults to 'MSEED'. None restores format autodetection.
+    :type file_format: str or None, optional
+    :param merge_method: **method** for :meth:`~obspy.core.stream.Stream.merge`
+        applied to the batch before writing, defaults to -1. None disables
+        merging.
+    :type merge_method: int or None, optional
+    :param update_index: should the bank index be updated by this write?
+        Defaults to True. initialize_wavebank passes False when index
+        updates are deferred to a single call at the end of ingestion.
+    :type update_index: bool, optional
+    """
+    # Collapse adjacent same-ID segments (within and across files) so
+    # gappy inputs do not fan out into one HDF5 dataset per fragment
+    if merge_method is not None:
+        batch.merge(method=merge_method)
+    try:
+        wbank.put_waveforms(batch, update_index=update_index)
+    except Exception as e:
+        Logger.warning(f'batched put_waveforms failed ({e}) - falling back to per-file insertion')
+        for msfile in batch_files:
+            wbank.put_waveforms(read(msfile, format=file_format),
+                                update_index=update_index)
+
+
 def connect_to_wavebank(base_path=os.path.join('.','WaveBank'),
                         path_structure='{year}',
                         name_structure='{seedid}.{time}',
+                        cache_index=False,
                         **kwargs):
     """Convenience method for connecting to an initialized
     WaveBank generated by :meth:`~eqcorrscan_utils.methods.obsplus.initialize_wavebank`
@@ -70,11 +502,101 @@ def connect_to_wavebank(base_path=os.path.join('.','WaveBank'),
     :type path_structure: str, optional
     :param name_structure: file naming structure for the wavebank, defaults to '{seedid}.{time}'
     :type name_structure: str, optional
+    :param cache_index: load the full bank index into memory on connect,
+        defaults to False. Unfiltered
+        :meth:`~obsplus.bank.wavebank.WaveBank.read_index` calls on the
+        returned handle are then served from the in-memory dataframe
+        rather than re-scanning the on-disk HDF5 index - useful for
+        long-running processes that query a large, static bank.
+    :type cache_index: bool, optional
     :return: wbank - established wavebank client
     :rtype: obsplus.bank.wavebank.WaveBank
-    """    
-    wbank = WaveBank(base_path=base_path,
-                     path_structure=path_structure,
-                     name_structure=name_structure,
-                     **kwargs)
-    return wbank
\ No newline at end of file
+
+    .. note::
+        Handles are memoized per (base_path, path_structure,
+        name_structure, cache_index, kwargs) so repeat connections from notebooks or
+        detection loops reuse the same WaveBank object instead of paying
+        the index-load cost again. Call
+        :meth:`~.connect_to_wavebank.cache_clear` if the bank has been
+        modified by another process and a fresh handle is needed.
+    """
+    base_path = Path(base_path).resolve()
+    # Freeze kwargs into a hashable key for the memoized constructor.
+    # Values like an Inventory or executor are legitimately unhashable
+    # - fall back to an uncached construction for those rather than
+    # failing the call
+    kwargs_key = tuple(sorted(kwargs.items()))
+    try:
+        hash(kwargs_key)
+    except TypeError:
+        Logger.debug('unhashable connection kwargs - bypassing the handle cache')
+        wbank = WaveBank(base_path=str(base_path),
+                         path_structure=path_structure,
+                         name_structure=name_structure,
+                         **kwargs)
+    else:
+        wbank = _connect_cached(str(base_path), path_structure,
+                                name_structure, kwargs_key, cache_index)
+    if cache_index and not hasattr(wbank, '_cached_index'):
+        _attach_index_cache(wbank)
+    return wbank
+
+
+def _attach_index_cache(wbank):
+    """PRIVATE METHOD
+
+    Load a wavebank's full index into memory and wrap its
+    :meth:`~obsplus.bank.wavebank.WaveBank.read_index` so unfiltered
+    calls are served from the cached dataframe instead of re-scanning
+    the on-disk HDF5 index
+
+    :param wbank: wavebank client to attach the cache to
+    :type wbank: obsplus.bank.wavebank.WaveBank
+    """
+    wbank.update_index()
+    original_read_index = wbank.read_index
+    wbank._cached_index = original_read_index()
+
+    def read_index(*args, **options):
+        # Filtered queries still go to the bank itself
+        if len(args) > 0 or len(options) > 0:
+            return original_read_index(*args, **options)
+        return wbank._cached_index
+
+    wbank.read_index = read_index
+
+
+@lru_cache(maxsize=16)
+def _connect_cached(base_path, path_structure, name_structure, kwargs_key,
+                    cache_index=False):
+    """PRIVATE METHOD
+
+    Memoized :class:`~obsplus.bank.wavebank.WaveBank` constructor
+    backing :meth:`~.connect_to_wavebank`
+
+    :param base_path: resolved base path of the wavebank
+    :type base_path: str
+    :param path_structure: internal directory structure for the wavebank
+    :type path_structure: str
+    :param name_structure: file naming structure for the wavebank
+    :type name_structure: str
+    :param kwargs_key: frozen (key, value) tuples of additional kwargs
+    :type kwargs_key: tuple
+    :param cache_index: cache-key discriminator only - index caching
+        mutates the handle in place (:meth:`~._attach_index_cache` wraps
+        its read_index), so opted-in and plain connections must memoize
+        to distinct WaveBank objects
+    :type cache_index: bool, optional
+    :return: wbank - established wavebank client
+    :rtype: obsplus.bank.wavebank.WaveBank
+    """
+    return WaveBank(base_path=base_path,
+                    path_structure=path_structure,
+                    name_structure=name_structure,
+                    **dict(kwargs_key))
+
+
+# Re-export cache controls so users can reset stale handles after the
+# bank changes out-of-process
+connect_to_wavebank.cache_clear = _connect_cached.cache_clear
+connect_to_wavebank.cache_info = _connect_cached.cache_info
\ No newline at end of file
@@ -15,14 +15,32 @@
     TODO: change `self.clusters` to `self.index`
     TODO: need an update_id_no method - incorporate into get_subset and remove
 """
-import os, logging, tarfile, shutil, pickle, tempfile, glob, fnmatch
+import os, io, json, time, logging, tarfile, shutil, pickle, struct, tempfile, glob
+from concurrent.futures import ThreadPoolExecutor
 
 from copy import deepcopy
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from scipy.cluster.hierarchy import linkage, dendrogram
+from scipy.cluster.hierarchy import dendrogram
 from scipy.spatial.distance import squareform
+# fastcluster's linkage is a drop-in replacement for scipy's with the
+# same condensed-distance input and method strings, but O(N^2) rather
+# than O(N^2 log N) - use it when available
+try:
+    from fastcluster import linkage
+    HAS_FASTCLUSTER = True
+except ImportError:
+    from scipy.cluster.hierarchy import linkage
+    HAS_FASTCLUSTER = False
+# numba is optional - when present, the dist_mat NaN fill /
+# symmetrization / zero-diagonal pass runs as a single parallel
+# compiled sweep instead of a chain of numpy temporaries
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 from obspy import read_events, read
 from obspy.core.event import Catalog
 from eqcorrscan import Tribe, Template
@@ -30,11 +48,73 @@ from eqcorrscan import Tribe, Template
 import eqcorrscan.utils.clustering as euc
 from eqcorrscan.core.match_filter.helpers import _safemembers, _par_read
 
+# Route EQcorrscan's internal hierarchical clustering through
+# fastcluster as well - euc.cluster calls the module-level linkage it
+# imported from scipy, so rebinding that name makes the euc.cluster
+# path inside ClusteringTribe.cluster transparently use the faster
+# implementation. fastcluster's linkage has no optimal_ordering
+# parameter and euc.cluster forwards that kwarg through, so the rebind
+# installs a shim that pops it and applies scipy's leaf ordering as a
+# post-pass when requested. Guarded so a refactor of eqcorrscan's
+# namespace degrades to stock scipy rather than an AttributeError
+def _fastcluster_linkage(y, optimal_ordering=False, **kwargs):
+    """PRIVATE METHOD
+
+    scipy-compatible wrapper around :meth:`~fastcluster.linkage` that
+    accepts the **optimal_ordering** kwarg scipy callers pass through,
+    applying :meth:`~scipy.cluster.hierarchy.optimal_leaf_ordering` as
+    a post-pass when it is requested
+
+    :param y: condensed (or square) distance input, as for scipy linkage
+    :type y: numpy.ndarray
+    :param optimal_ordering: reorder linkage leaves for minimal
+        successive distances?, defaults to False
+    :type optimal_ordering: bool, optional
+    :return:
+     - **Z** (*numpy.ndarray*) -- linkage matrix
+    """
+    Z = linkage(y, **kwargs)
+    if optimal_ordering:
+        from scipy.cluster.hierarchy import optimal_leaf_ordering
+        Z = optimal_leaf_ordering(Z, y)
+    return Z
+
+if HAS_FASTCLUSTER and hasattr(euc, 'linkage'):
+    euc.linkage = _fastcluster_linkage
+
 from eqcutil.util.pandas import reindex_columns
 from eqcutil.viz import eqc_compat
 
 Logger = logging.getLogger(__name__)
 
+if HAS_NUMBA:
+    # no fastmath here - its nnan assumption lets LLVM fold the
+    # np.isnan test to False, which would silently skip the fill this
+    # kernel exists for
+    @njit(parallel=True, cache=True)
+    def _condensed_fill(dm, fill):
+        """Gather the upper triangle of a square distance matrix into
+        a condensed distance vector, substituting **fill** for NaN
+        entries, in one parallel pass
+
+        :param dm: square distance matrix (read only)
+        :type dm: numpy.ndarray
+        :param fill: value to substitute for NaN distances
+        :type fill: float
+        :return: condensed distance vector of length n*(n-1)/2
+        :rtype: numpy.ndarray
+        """
+        n = dm.shape[0]
+        out = np.empty(n*(n - 1)//2, dtype=np.float64)
+        for i in prange(n - 1):
+            base = i*n - (i*(i + 1))//2 - i - 1
+            for j in range(i + 1, n):
+                v = dm[i, j]
+                if np.isnan(v):
+                    v = fill
+                out[base + j] = v
+        return out
+
 class ClusteringTribe(Tribe):
     """An augmentation of the :class:`~eqcorrscan.Tribe` class that
     extends EQcorrscan Tribe clustering and stacking methods as 
@@ -69,9 +149,15 @@ class ClusteringTribe(Tribe):
         if not hasattr(self,'snuffle'):
             eqc_compat.plant()
 
+        # Rows queued by add_template - materialized into the clusters
+        # dataframe with a single concat on first read
+        self._pending_rows = []
         self.clusters = pd.DataFrame(columns=['id_no'])
         self.dist_mat = None
         self.cluster_kwargs = {}
+        # Lazy {name: template} lookup - built on first use and
+        # invalidated whenever template membership changes
+        self._name_to_template = None
 
         if isinstance(templates, Template):
             templates = [templates]
@@ -128,40 +214,116 @@ class ClusteringTribe(Tribe):
             raise NotImplementedError
         return rstr
 
+    def _flush_pending_rows(self):
+        """Materialize rows queued by :meth:`~.ClusteringTribe.add_template`
+        into the **clusters** dataframe with a single concat. Batching
+        the appends this way keeps bulk template loading O(N) instead of
+        paying a full-dataframe copy per added template.
+        """
+        if len(self._pending_rows) > 0:
+            new_rows = pd.DataFrame(
+                {'id_no': [_r[1] for _r in self._pending_rows]},
+                index=[_r[0] for _r in self._pending_rows])
+            self._clusters = pd.concat([self._clusters, new_rows],
+                                       axis=0, ignore_index=False)
+            self._pending_rows = []
+
+    @property
+    def clusters(self):
+        self._flush_pending_rows()
+        return self._clusters
+
+    @clusters.setter
+    def clusters(self, value):
+        self._pending_rows = []
+        self._clusters = value
+        # {method: {group id: name array}} lookups built by groupby -
+        # stale once the clusters table changes
+        self._group_cache = {}
+        # Keep an O(1) membership set of template names in sync with
+        # the dataframe index, plus a per-basename counter so
+        # deduplication does not rescan from the start suffix each time
+        self._name_set = set(value.index)
+        self._dup_counter = {}
+
     # Shorthand for clusters
     def get_clusters(self):
         return self.clusters
-    
+
     _c = property(get_clusters)
 
+    @property
+    def dist_mat(self):
+        return self._dist_mat
+
+    @dist_mat.setter
+    def dist_mat(self, value):
+        self._dist_mat = value
+        # Linkage matrices keyed by (linkage kwargs, nan fill) - routing
+        # every assignment (including direct user assignment) through
+        # this setter means cached linkages can never outlive the matrix
+        # they were computed from, while threshold sweeps over an
+        # unchanged matrix still only pay for linkage once
+        self._linkage_cache = {}
+
     def _deduplicate_name(self, other, delimiter='__', start=0):
-        if other not in self.clusters.index.values:
+        if other not in self._name_set:
             return other
+        if delimiter not in other:
+            basename = other
         else:
-            if delimiter not in other:
-                basename = other
-            else:
-                basename = other.split('__')[0]
-            matches = fnmatch.filter(self.clusters.index.values, basename+'*')
-            while f'{basename}{delimiter}{start}' in matches:
-                start += 1
-            return f'{basename}{delimiter}{start}'
+            basename = other.split(delimiter)[0]
+        # Resume from the last suffix handed out for this basename so
+        # duplicate-heavy ingests do not rescan suffixes from **start**
+        suffix = self._dup_counter.get(basename, start)
+        while f'{basename}{delimiter}{suffix}' in self._name_set:
+            suffix += 1
+        self._dup_counter[basename] = suffix + 1
+        return f'{basename}{delimiter}{suffix}'
 
     def add_template(self, other, rename_duplicates=False, **options):
         if isinstance(other, Template):
-            if other.name in self.clusters.index.values:
+            if self._has_name(other.name):
                 if rename_duplicates:
                     other.name = self._deduplicate_name(other.name, **options)
                 else:
                     raise AttributeError(f'duplicate name {other.name} - aborting add_template')
             self.templates.append(other)
-            self.clusters = pd.concat([self.clusters, pd.DataFrame({'id_no':len(self)-1}, index=[other.name])],
-                                      axis=0, ignore_index=False)
+            self._name_to_template = None
+            # Queue the row rather than concatenating per template -
+            # the clusters getter materializes pending rows in one go
+            self._pending_rows.append((other.name, len(self.templates)-1))
+            self._name_set.add(other.name)
+            self._group_cache = {}
         else:
             raise TypeError('other must be type eqcorrscan.Template')
 
+    def _has_name(self, name):
+        """Check if a template name is already present in this
+        ClusteringTribe, including rows queued but not yet materialized
+        into **clusters**
+
+        :param name: template name to check
+        :type name: str
+        :return: True if the name is present
+        :rtype: bool
+        """
+        return name in self._name_set
+
+    def _get_name_to_template(self):
+        """Return the cached {name: template} lookup for this
+        ClusteringTribe, (re)building it if template membership has
+        changed since the last call
+
+        :return: mapping of template names to templates
+        :rtype: dict
+        """
+        if self._name_to_template is None:
+            self._name_to_template = {_t.name: _t for _t in self.templates}
+        return self._name_to_template
+
     def _get_template_list(self):
-        """Create a template_list input for 
+        """Create a template_list input for
         :meth:`~eqcorrscan.utils.clusering.cluster`
         from this ClusteringTribe with the option
         to use template names instead of position
@@ -170,8 +332,10 @@ class ClusteringTribe(Tribe):
         :return: _description_
         :rtype: _type_
         """
-     
-        return [(_t.st, _e) for _e, _t in enumerate(self)]
+        name_to_template = self._get_name_to_template()
+        names = self.clusters.index.to_numpy()
+        ids = self.clusters['id_no'].to_numpy()
+        return [(name_to_template[_n].st, int(_i)) for _n, _i in zip(names, ids)]
 
     def cluster(self, method, **kwargs):
         """Extended wrapper for EQcorrscan Template correlation methods
@@ -188,14 +352,15 @@ class ClusteringTribe(Tribe):
         if len(self) < 2:
             raise AttributeError('insufficient number of templates to cluster') 
 
-        index = []; values = []
-
         if method in ['space_cluster','space_time_cluster']:
             tribes = Tribe.cluster(self, method, **kwargs)
-            for _e, tribe in enumerate(tribes):
-                for template in tribe:
-                    index.append(template.name)
-                    values.append(_e)
+            # Build the name/group arrays with one flat pass + repeat
+            # instead of per-template python appends
+            index = np.array([template.name for tribe in tribes
+                              for template in tribe])
+            sizes = np.fromiter((len(tribe) for tribe in tribes),
+                                dtype=np.intp, count=len(tribes))
+            values = np.repeat(np.arange(len(tribes)), sizes)
 
         elif method == 'correlation_cluster':
             if 'save_corrmat' in kwargs.keys():
@@ -209,16 +374,27 @@ class ClusteringTribe(Tribe):
                 save_local = False
             groups = euc.cluster(self._get_template_list(), **kwargs)
             if 'save_corrmat' in kwargs.keys():
-                self.dist_mat = np.load('dist_mat.npy')
-                if not save_local:
+                if save_local:
+                    # Keep the on-disk copy and memory-map it - pages
+                    # are demand-loaded, so the O(N^2) matrix costs
+                    # near-zero RAM until sliced
+                    self.dist_mat = np.load('dist_mat.npy', mmap_mode='r')
+                else:
+                    # Correlation distances lie in [0, 2] - float32
+                    # precision is ample and halves the resident bytes
+                    self.dist_mat = np.load('dist_mat.npy').astype(
+                        np.float32, copy=False)
                     os.remove('dist_mat.npy')
-            for _e, group in enumerate(groups):
-                for entry in group:
-                    try:
-                        index.append(self.templates[entry[1]].name)
-                    except:
-                        breakpoint()
-                    values.append(_e)
+            # Map group-entry template positions onto names with a
+            # single fancy-index gather
+            template_names = np.array([_t.name for _t in self.templates])
+            sizes = np.fromiter((len(group) for group in groups),
+                                dtype=np.intp, count=len(groups))
+            values = np.repeat(np.arange(len(groups)), sizes)
+            positions = np.fromiter(
+                (entry[1] for group in groups for entry in group),
+                dtype=np.intp, count=int(sizes.sum()))
+            index = template_names[positions]
         else:
             raise ValueError(f'method {method} not supported.')
 
@@ -229,8 +405,34 @@ class ClusteringTribe(Tribe):
             self.clusters = pd.concat([self.clusters, pd.DataFrame({method: values}, index=index)],
                                       axis=1, ignore_index=False)
         else:
-            for _e, name in enumerate(index):
-                self.clusters.loc[name, method] = values[_e]
+            self.clusters.loc[index, method] = np.asarray(values)
+        self._group_cache = {}
+
+    def groupby(self, method):
+        """Return a cached ``{group id: template name array}`` lookup
+        for a given clustering method
+
+        The lookup is built once per method with a single
+        :meth:`~pandas.DataFrame.groupby` pass and reused across
+        repeated :meth:`~.ClusteringTribe.select_cluster` calls,
+        rather than re-filtering the **clusters** table per group id.
+        The cache is invalidated whenever template membership or the
+        **clusters** table changes.
+
+        :param method: clustering method name (a **clusters** column)
+        :type method: str
+        :return:
+         - **groups** (*dict*) -- mapping of group id numbers to arrays
+            of template names in that group
+        """
+        if method in self._group_cache:
+            return self._group_cache[method]
+        if method not in self.clusters.columns:
+            raise KeyError(f'cluster method {method} not yet run on this ClusteringTribe')
+        groups = {gid: grp.index.values
+                  for gid, grp in self.clusters.groupby(method)}
+        self._group_cache[method] = groups
+        return groups
 
     def get_subset(self, names):
         """Get an arbitrary subset of templates based on a list
@@ -248,19 +450,21 @@ class ClusteringTribe(Tribe):
         if isinstance(names, str):
             names = [names]
         # Catch case where not all names are present
-        if not set(names) <= set(self.clusters.index.values):
+        missing = set(names) - self._name_set
+        if missing:
             raise ValueError('Not all provided names match templates in this ClusterTribe')
         # Proceed with making subset
-        subset = self.__class__(templates = [self.select(name) for name in names])
+        lookup = self._get_name_to_template()
+        subset = self.__class__(templates = [lookup[name] for name in names])
         # Subset the clusters index
         subset.clusters = self.clusters[self.clusters.index.isin(names)]
         subset.cluster_kwargs = self.cluster_kwargs
-        # If there is a dist_mat, also subset that
+        # If there is a dist_mat, also subset that with a single
+        # vectorized gather rather than a python double-loop
         if self.dist_mat is not None:
-            subset.dist_mat = np.full(shape=(len(names), len(names)), fill_value=np.nan)
-            for xx,ii in enumerate(subset.clusters.id_no.values):
-                for yy,jj in enumerate(subset.clusters.id_no.values):
-                    subset.dist_mat[xx,yy] = self.dist_mat[ii,jj]
+            dm = np.asarray(self.dist_mat)
+            ids = np.asarray(subset.clusters.id_no.values, dtype=np.intp)
+            subset.dist_mat = dm[np.ix_(ids, ids)]
         # return subset
         return subset
     
@@ -287,8 +491,7 @@ class ClusteringTribe(Tribe):
             return 
         elif method not in self.clusters.columns:
             Logger.warning(f'cluster method {method} not yet run on this ClusteringTribe')
-        names = self.clusters[self.clusters[method] == index].index.values
-        return self.get_subset(names)
+        return self.get_subset(self.groupby(method)[index])
 
 
     def _get_linkage(self, **kwargs):
@@ -314,12 +517,47 @@ class ClusteringTribe(Tribe):
                     kwargs.update({_k: _v})
 
             dm = self.dist_mat
-            # Apply fill
-            dist_mat = euc.handle_distmat_nans(dm, rndw)
-            # Vectorize
-            dist_vect = squareform(dist_mat)
+            # Serve a cached linkage if one exists for this
+            # parameterization - the dist_mat setter empties the cache
+            # on reassignment, so entries here always belong to the
+            # current matrix
+            key = (kwargs['method'], kwargs['metric'],
+                   kwargs['optimal_ordering'], rndw)
+            if key in self._linkage_cache:
+                return self._linkage_cache[key]
+            # Build the condensed distance vector straight from the
+            # upper triangle for numeric fills - linkage takes condensed
+            # input natively, so this skips materializing a filled NxN
+            # copy plus the squareform round-trip
+            if isinstance(rndw, (int, float)) and not isinstance(rndw, bool):
+                if HAS_NUMBA:
+                    dist_vect = _condensed_fill(np.asarray(dm), float(rndw))
+                else:
+                    n = dm.shape[0]
+                    dist_vect = np.asarray(dm, dtype=np.float64)[
+                        np.triu_indices(n, k=1)]
+                    np.nan_to_num(dist_vect, nan=float(rndw), copy=False)
+            else:
+                # eqcorrscan's helper is required for 'mean'/'min'
+                # fills and needs the full square matrix - materialize
+                # a writable copy first since dm may be a read-only
+                # memmap and the fill mutates its input
+                dist_vect = squareform(euc.handle_distmat_nans(np.array(dm), rndw))
             # Recalculate linkage
-            Z = linkage(dist_vect, **kwargs)
+            if HAS_FASTCLUSTER:
+                # fastcluster does not accept optimal_ordering - apply
+                # scipy's leaf ordering as a post-pass if requested
+                optimal_ordering = kwargs.pop('optimal_ordering', False)
+                # the condensed vector may only be clobbered when the
+                # leaf-ordering post-pass does not need it again
+                Z = linkage(dist_vect.astype(np.float64, copy=False),
+                            preserve_input=bool(optimal_ordering), **kwargs)
+                if optimal_ordering:
+                    from scipy.cluster.hierarchy import optimal_leaf_ordering
+                    Z = optimal_leaf_ordering(Z, dist_vect)
+            else:
+                Z = linkage(dist_vect, **kwargs)
+            self._linkage_cache[key] = Z
             return Z
 
     def cct_regroup(self, corr_thresh, inplace=False, **kwargs):
@@ -358,6 +596,9 @@ class ClusteringTribe(Tribe):
             if inplace:
                 self.clusters.correlation_cluster=indices
                 ckw['corr_thresh'] = np.round(corr_thresh,decimals=prec)
+                # in-place column write bypasses the clusters setter -
+                # drop the stale group lookups by hand
+                self._group_cache = {}
             else:
                 return output
         
@@ -376,9 +617,9 @@ class ClusteringTribe(Tribe):
             Logger.critical(f'correlation clustering has not been run on this ClusteringTribe')
         
         lkwargs = {}
-        for _k, _v in kwargs.items():
-            if _k in ['method','metric','optimal_ordering']:
-                lkwargs.update({_k, kwargs.pop(_k)})
+        for _k in ['method','metric','optimal_ordering']:
+            if _k in kwargs:
+                lkwargs[_k] = kwargs.pop(_k)
 
         Z = self._get_linkage(**lkwargs)
         if corr_thresh is None:
@@ -434,12 +675,10 @@ class ClusteringTribe(Tribe):
         R = dendrogram(Z, **kwargs)
 
         if not xlvalues is None:
-            newlabels = []
-            for _txt in ax.get_xticklabels():
-                ind = int(_txt.get_text())
-                newlabel = xlvalues[ind]
-                newlabels.append(newlabel)
-            ax.set_xticklabels(newlabels)
+            inds = np.fromiter(
+                (int(_txt.get_text()) for _txt in ax.get_xticklabels()),
+                dtype=np.intp)
+            ax.set_xticklabels(np.asarray(xlvalues)[inds])
             if isinstance(xlabels, str):
                 ax.set_xlabel(xlabels)
             elif isinstance(xlabels, list):
@@ -458,10 +697,16 @@ class ClusteringTribe(Tribe):
 
 
 
-    def write(self, filename, compress=True, catalog_format="QUAKEML"):
+    def write(self, filename, compress=True, catalog_format="QUAKEML",
+              compresslevel=1, write_cores=None):
         """
         Write the clusteringtribe to a file using tar archive formatting.
 
+        When **compress** is True, archive members are streamed into the
+        tarball through in-memory buffers rather than staged as a
+        directory that is re-read, compressed, and deleted - roughly
+        halving the disk bytes written for large tribes.
+
         :type filename: str
         :param filename:
             Filename to write to, if it exists it will be appended to.
@@ -475,6 +720,17 @@ class ClusteringTribe(Tribe):
             SC3ML, QUAKEML are supported. Note that not all information is
             written for all formats (QUAKEML is the most complete, but is
             slow for IO).
+        :type compresslevel: int
+        :param compresslevel:
+            gzip compression level for compressed archives, defaults to 1.
+            Waveform payloads compress poorly, so low levels are several
+            times faster at a similar ratio.
+        :type write_cores: int
+        :param write_cores:
+            number of threads used to encode/write template MSEED data,
+            defaults to None, which resolves as min(8, os.cpu_count()).
+            MSEED encoding releases the GIL in obspy's C writer so
+            threads overlap sample packing with disk I/O.
 
         .. rubric:: Example
 
@@ -489,15 +745,14 @@ class ClusteringTribe(Tribe):
         """
         from eqcorrscan.core.match_filter import CAT_EXT_MAP
 
+        if filename.endswith('.pkl5'):
+            self._write_pkl5(filename)
+            return self
+
         if catalog_format not in CAT_EXT_MAP.keys():
             raise TypeError("{0} is not supported".format(catalog_format))
         dirname, ext = os.path.splitext(filename)
 
-        # Make directory if it doesn't exist
-        if not os.path.isdir(dirname):
-            os.makedirs(dirname)
-        self._par_write(dirname)
-
         # Compose tribe catalog
         tribe_cat = Catalog()
         for t in self.templates:
@@ -510,47 +765,189 @@ class ClusteringTribe(Tribe):
                         comment.text = "eqcorrscan_template_{0}".format(t.name)
                 tribe_cat.append(t.event)
 
+        if compress:
+            if not filename.endswith(".tgz"):
+                Logger.info("Appending '.tgz' to filename.")
+                filename += ".tgz"
+            self._write_tar_streaming(filename, dirname, tribe_cat,
+                                      catalog_format, CAT_EXT_MAP,
+                                      compresslevel=compresslevel,
+                                      write_cores=write_cores)
+            return self
+
+        # Uncompressed output - write files into a folder as before
+        os.makedirs(dirname, exist_ok=True)
+        self._par_write(dirname)
+
         # Write catalog to disk
         if len(tribe_cat) > 0:
             tribe_cat.write(
                 os.path.join(dirname, 'tribe_cat.{0}'.format(
                     CAT_EXT_MAP[catalog_format])), format=catalog_format)
-            
-        # Write template streams to disk
-        for template in self.templates:
+
+        # Write template streams to disk in parallel - encoding
+        # releases the GIL, so threads overlap packing and disk I/O
+        if write_cores is None:
+            write_cores = min(8, os.cpu_count())
+
+        def _write_one(template):
             template.st.write(
                 os.path.join(dirname, '{0}.ms'.format(template.name)),
                 format='MSEED')
+
+        with ThreadPoolExecutor(max_workers=write_cores) as executor:
+            list(executor.map(_write_one, self.templates))
         # ADDED BY NTS - write clustering summary to disk
         self.clusters.to_csv(os.path.join(dirname,'clusters.csv'), header=True, index=True)
 
-        # Write clustering kwargs to disk
-        for _k, _v in self.cluster_kwargs.items():
-            with open(os.path.join(dirname, f'{_k}_kwargs.csv'), 'w') as file:
-                for _l, _w in _v.items():
-                    if isinstance(_w, str):
-                        file.write(f'{_l},{_w}\n')
-                    else:
-                        file.write(f'{_l},{repr(_w)}\n')
+        # Write clustering kwargs to disk as a single JSON sidecar -
+        # one round-trip preserves bool/int/float types that the old
+        # per-method CSV files required hand-rolled coercion to recover
+        with open(os.path.join(dirname, 'cluster_kwargs.json'), 'w') as file:
+            json.dump(self.cluster_kwargs, file, default=str)
         if self.dist_mat is not None:
-            np.save(os.path.join(dirname,'dist_mat.npy'), np.array(self.dist_mat))
-
-        # Run compression if specified
-        if compress:
-            if not filename.endswith(".tgz"):
-                Logger.info("Appending '.tgz' to filename.")
-                filename += ".tgz"
-            with tarfile.open(filename, "w:gz") as tar:
-                tar.add(dirname, arcname=os.path.basename(dirname))
-            shutil.rmtree(dirname)
+            # Correlation distances lie in [0, 2] - float32 halves the
+            # disk/memory footprint with precision to spare
+            np.save(os.path.join(dirname,'dist_mat.npy'),
+                    np.asarray(self.dist_mat, dtype=np.float32))
         return self
 
-    def read(self, filename):
+    def _write_tar_streaming(self, filename, dirname, tribe_cat,
+                             catalog_format, cat_ext_map, compresslevel=1,
+                             write_cores=None):
+        """Stream archive members straight into a gzipped tarball via
+        in-memory buffers, avoiding the write-directory / re-read /
+        compress / rmtree round-trip
+
+        :param filename: tarball file name (ending in .tgz)
+        :type filename: str
+        :param dirname: archive member prefix (tribe directory name)
+        :type dirname: str
+        :param tribe_cat: composed catalog of template events
+        :type tribe_cat: obspy.core.event.Catalog
+        :param catalog_format: catalog output format
+        :type catalog_format: str
+        :param cat_ext_map: catalog format to file extension mapping
+        :type cat_ext_map: dict
+        :param compresslevel: gzip compression level, defaults to 1
+        :type compresslevel: int, optional
+        :param write_cores: number of threads used to encode template
+            MSEED buffers, defaults to None (resolves as
+            min(8, os.cpu_count())). Encoded buffers are appended to
+            the tarball serially since tarfile is not thread-safe.
+        :type write_cores: int, optional
+        """
+        base = os.path.basename(dirname)
+
+        def _add_bytes(tar, name, data):
+            info = tarfile.TarInfo(name=f'{base}/{name}')
+            info.size = len(data)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(data))
+
+        with tarfile.open(filename, "w:gz", compresslevel=compresslevel) as tar:
+            # Template parameters - _par_write only writes to a folder,
+            # so stage this one small file through a temp directory
+            with tempfile.TemporaryDirectory() as tmpdir:
+                self._par_write(tmpdir)
+                for pfile in sorted(glob.glob(os.path.join(tmpdir, '*'))):
+                    tar.add(pfile, arcname=f'{base}/{os.path.basename(pfile)}')
+            # Catalog
+            if len(tribe_cat) > 0:
+                buf = io.BytesIO()
+                tribe_cat.write(buf, format=catalog_format)
+                _add_bytes(
+                    tar, f'tribe_cat.{cat_ext_map[catalog_format]}',
+                    buf.getvalue())
+            # Template streams - encode in parallel, append serially
+            if write_cores is None:
+                write_cores = min(8, os.cpu_count())
+
+            def _encode_one(template):
+                buf = io.BytesIO()
+                template.st.write(buf, format='MSEED')
+                return template.name, buf.getvalue()
+
+            with ThreadPoolExecutor(max_workers=write_cores) as executor:
+                for name, data in executor.map(_encode_one, self.templates):
+                    _add_bytes(tar, f'{name}.ms', data)
+            # Clustering summary
+            _add_bytes(tar, 'clusters.csv',
+                       self.clusters.to_csv(header=True, index=True).encode())
+            # Clustering kwargs
+            _add_bytes(tar, 'cluster_kwargs.json',
+                       json.dumps(self.cluster_kwargs, default=str).encode())
+            # Distance matrix
+            if self.dist_mat is not None:
+                buf = io.BytesIO()
+                np.save(buf, np.asarray(self.dist_mat, dtype=np.float32))
+                _add_bytes(tar, 'dist_mat.npy', buf.getvalue())
+
+    def _write_pkl5(self, filename):
+        """PRIVATE METHOD
+
+        Serialize this ClusteringTribe to a ``.pkl5`` file using pickle
+        protocol 5 with out-of-band buffers. Large numpy payloads
+        (**dist_mat**, template sample arrays) are written once as raw
+        buffers instead of being copied through the pickle byte stream,
+        roughly halving peak memory during (de)serialization.
+
+        File layout: an 8-byte little-endian payload length, the pickle
+        payload, then each out-of-band buffer as an 8-byte length prefix
+        followed by its raw bytes. Legacy ``.pkl`` files written with
+        :meth:`~pickle.dump` remain readable via :meth:`~.ClusteringTribe.read`.
+
+        :param filename: file to write to, must end with '.pkl5'
+        :type filename: str
+        """
+        buffers = []
+        payload = pickle.dumps(self, protocol=5,
+                               buffer_callback=buffers.append)
+        with open(filename, 'wb') as f:
+            f.write(struct.pack('<Q', len(payload)))
+            f.write(payload)
+            for buf in buffers:
+                raw = buf.raw()
+                f.write(struct.pack('<Q', raw.nbytes))
+                f.write(raw)
+
+    @staticmethod
+    def _read_pkl5(filename):
+        """PRIVATE METHOD
+
+        Load a ClusteringTribe from a ``.pkl5`` file written by
+        :meth:`~.ClusteringTribe._write_pkl5`.
+
+        :param filename: file to read from
+        :type filename: str
+        :return:
+         - **tribe** (:class:`~.ClusteringTribe`) -- deserialized tribe
+        """
+        with open(filename, 'rb') as f:
+            (plen,) = struct.unpack('<Q', f.read(8))
+            payload = f.read(plen)
+            buffers = []
+            while True:
+                header = f.read(8)
+                if not header:
+                    break
+                (blen,) = struct.unpack('<Q', header)
+                # bytearray, not bytes - arrays rebuilt over immutable
+                # buffers come back read-only, which breaks in-place
+                # obspy processing on the template traces
+                buffers.append(bytearray(f.read(blen)))
+        return pickle.loads(payload, buffers=buffers)
+
+    def read(self, filename, read_cores=None):
         """
         Read a clustertribe of templates from a tar formatted file.
 
         :type filename: str
         :param filename: File to read templates from.
+        :type read_cores: int
+        :param read_cores: number of threads used to read template MSEED
+            files, defaults to None, which resolves as
+            min(8, os.cpu_count()).
 
         .. rubric:: Example
 
@@ -568,6 +965,9 @@ class ClusteringTribe(Tribe):
         >>> tribe_back == tribe
         True
         """
+        if filename.endswith(".pkl5"):
+            self.__iadd__(self._read_pkl5(filename))
+            return self
         if filename.endswith(".pkl"):
             with open(filename, "rb") as f:
                 self.__iadd__(pickle.load(f))
@@ -576,18 +976,22 @@ class ClusteringTribe(Tribe):
             temp_dir = tempfile.mkdtemp()
             arc.extractall(path=temp_dir, members=_safemembers(arc))
             tribe_dir = glob.glob(temp_dir + os.sep + '*')[0]
-            self._read_from_folder(dirname=tribe_dir)
+            self._read_from_folder(dirname=tribe_dir, read_cores=read_cores)
         shutil.rmtree(temp_dir)
         # Assign unique ids
         # self.__unique_ids()
         return self
 
-    def _read_from_folder(self, dirname):
+    def _read_from_folder(self, dirname, read_cores=None):
         """
         Internal folder reader.
 
         :type dirname: str
         :param dirname: Folder to read from.
+        :type read_cores: int
+        :param read_cores: number of threads used to read template MSEED
+            files, defaults to None, which resolves as
+            min(8, os.cpu_count()).
         """
         templates = _par_read(dirname=dirname, compressed=False)
         # Template Waveform Files
@@ -596,7 +1000,8 @@ class ClusteringTribe(Tribe):
         tribe_cat_file = glob.glob(os.path.join(dirname, "tribe_cat.*"))
         # NEW - cluster summary file
         cluster_file = glob.glob(os.path.join(dirname,'clusters.csv'))
-        # NEW - clustering kwargs file
+        # NEW - clustering kwargs sidecar (legacy CSVs for older archives)
+        cluster_kwarg_json = os.path.join(dirname, 'cluster_kwargs.json')
         cluster_kwarg_files = glob.glob(os.path.join(dirname,'*_kwargs.csv'))
         # NEW - distance matrix file
         dist_mat_file = glob.glob(os.path.join(dirname, 'dist_mat.npy'))
@@ -606,27 +1011,49 @@ class ClusteringTribe(Tribe):
         else:
             tribe_cat = Catalog()
 
-        # Load templates with new names
-        previous_template_names = [t.name for t in self.templates]
+        # Build lookup tables once rather than scanning the file list
+        # and catalog comments per template
+        previous_template_names = {t.name for t in self.templates}
+        t_file_by_name = {}
+        for t_file in t_files:
+            t_name = os.path.basename(t_file)[:-3]
+            if t_name in t_file_by_name:
+                Logger.warning('Multiple waveforms found, using: ' +
+                               t_file_by_name[t_name])
+            else:
+                t_file_by_name[t_name] = t_file
+        event_by_name = {}
+        for event in tribe_cat:
+            for comment in event.comments:
+                if comment.text and comment.text.startswith('eqcorrscan_template_'):
+                    event_by_name[comment.text[len('eqcorrscan_template_'):]] = event
+
+        # Load templates with new names, pairing each with its waveform
+        # file so the reads can run on a thread pool below
+        pairs = []
         for template in templates:
             if template.name in previous_template_names:
                 # Don't read in for templates that we already have.
                 continue
-            for event in tribe_cat:
-                for comment in event.comments:
-                    if comment.text == 'eqcorrscan_template_' + template.name:
-                        template.event = event
-            t_file = [t for t in t_files
-                      if t.split(os.sep)[-1] == template.name + '.ms']
-            if len(t_file) == 0:
+            if template.name in event_by_name:
+                template.event = event_by_name[template.name]
+            t_file = t_file_by_name.get(template.name)
+            if t_file is None:
                 Logger.error('No waveform for template: ' + template.name)
                 continue
-            elif len(t_file) > 1:
-                Logger.warning('Multiple waveforms found, using: ' + t_file[0])
-            template.st = read(t_file[0])
+            pairs.append((template, t_file))
+        # obspy's MSEED reader releases the GIL, so threaded reads
+        # overlap decode and disk I/O
+        if read_cores is None:
+            read_cores = min(8, os.cpu_count())
+        with ThreadPoolExecutor(max_workers=read_cores) as executor:
+            streams = executor.map(read, (t_file for _, t_file in pairs))
+            for (template, _), st in zip(pairs, streams):
+                template.st = st
         # Remove templates that do not have streams
         templates = [t for t in templates if t.st is not None]
         self.templates.extend(templates)
+        self._name_to_template = None
 
         # Re-constitute groups
         if len(cluster_file) != 0:
@@ -645,7 +1072,13 @@ class ClusteringTribe(Tribe):
             else:
                 Logger.error('cluster_group file names loaded do not match template names loaded')
 
-        # Reconstitute processing information
+        # Reconstitute processing information - prefer the JSON sidecar,
+        # which round-trips types directly; older archives carry one
+        # CSV per method that needs the coercion ladder below
+        if os.path.isfile(cluster_kwarg_json):
+            with open(cluster_kwarg_json, 'r') as file:
+                self.cluster_kwargs.update(json.load(file))
+            cluster_kwarg_files = []
         for ckf in cluster_kwarg_files:
             path, name = os.path.split(ckf)
             name, ext = os.path.splitext(name)
@@ -671,10 +1104,14 @@ class ClusteringTribe(Tribe):
                 # except ValueError:
                 #     self.cluster_kwargs[ctype].update({_k: _r.values[0]})
                 
-        # Load dist_mat
+        # Load eagerly - the only caller is :meth:`~.ClusteringTribe.read`,
+        # which extracts the archive to a temp dir and rmtree's it as soon
+        # as this returns, so a memmap here would pin a deleted file (and
+        # break the rmtree on Windows). The mmap route is reserved for
+        # :meth:`~.ClusteringTribe.cluster` with save_corrmat=True, where
+        # the backing .npy persists on disk
         if len(dist_mat_file) > 0:
-            dist_mat = np.load(dist_mat_file[0])
-            self.dist_mat = dist_mat
+            self.dist_mat = np.load(dist_mat_file[0])
         return
 
     def select_template_traces(self, remove_empty_templates=True, **kwargs):
@@ -694,18 +1131,48 @@ class ClusteringTribe(Tribe):
         :param kwargs: key-word argument collector that passes kwargs to 
             :meth:`~obspy.core.stream.Stream.select`
         """        
-        # Iterate across templates
+        # Iterate across templates, collecting empties rather than
+        # mutating the tribe mid-iteration
+        empty_names = []
         for template in self:
             # Use obspy.core.stream.Stream.select to subset trace
             template.st = template.st.select(**kwargs)
             # Assess if template waveforms is empty & if we want to remove empties
             if len(template.st) == 0 and remove_empty_templates:
-                # If so, remove using eqcorrscan.Tribe.remove
-                self.remove(template)
+                empty_names.append(template.name)
+        if len(empty_names) > 0:
+            self.remove_many(empty_names)
+
+
+    def copy(self, deep=True):
+        """Create a copy of this ClusteringTribe
 
+        Templates are copied via :meth:`~eqcorrscan.core.match_filter.template.Template.copy`
+        and the **clusters** table and **cluster_kwargs** are always
+        copied, which is substantially faster than a blanket
+        ``deepcopy(self)`` pickle-walk over every obspy object.
 
-    def copy(self):
-        return deepcopy(self)
+        :param deep: should the **dist_mat** array also be copied?
+            When False the (large, effectively immutable) distance
+            matrix is shared by reference with this ClusteringTribe,
+            defaults to True
+        :type deep: bool, optional
+        :return:
+         - **new** (:class:`~.ClusteringTribe`) -- copy of this ClusteringTribe
+        """
+        new = self.__class__.__new__(self.__class__)
+        new.templates = [_t.copy() for _t in self.templates]
+        new._pending_rows = []
+        new.clusters = self.clusters.copy(deep=True)
+        new.cluster_kwargs = deepcopy(self.cluster_kwargs)
+        if self.dist_mat is None:
+            new.dist_mat = None
+        elif deep:
+            new.dist_mat = np.array(self.dist_mat)
+        else:
+            new.dist_mat = self.dist_mat
+        new._name_to_template = None
+        return new
 
 
     def remove(self, template):
@@ -723,6 +1190,34 @@ class ClusteringTribe(Tribe):
             self.clusters.drop(labels=template.name, inplace=True)
             # remove the template
             Tribe.remove(self, template)
+            # invalidate the name lookup and membership set entry
+            self._name_to_template = None
+            self._name_set.discard(template.name)
+            self._group_cache = {}
+
+    def remove_many(self, names):
+        """Remove multiple templates from this ClusteringTribe by name
+        in a single pass
+
+        Filters both the **templates** list and the **clusters** rows
+        with one boolean mask each, rather than paying a full list and
+        dataframe scan per removed template as repeated calls of
+        :meth:`~.ClusteringTribe.remove` would
+
+        :param names: name or collection of names of templates to remove
+        :type names: str or iterable thereof
+
+        DEBUG: Need to re-index id_no before ending
+        """
+        if isinstance(names, str):
+            names = {names}
+        else:
+            names = set(names)
+        self.templates[:] = [_t for _t in self.templates if _t.name not in names]
+        self.clusters = self.clusters.loc[~self.clusters.index.isin(names)]
+        # invalidate caches
+        self._name_to_template = None
+        self._linkage_cache.clear()
 
     def reindex_columns(self, group='correlation_cluster', ascending=False):
         """Reindex a specified group by decending (or ascending)
@@ -732,8 +1227,12 @@ class ClusteringTribe(Tribe):
         :type group: str, optional
         :param ascending: Should group number get bigger with more members? Defaults to False
         :type ascending: bool, optional
-        """        
-        return reindex_columns(self.clusters, group, ascending=ascending, inplace=True)
+        """
+        result = reindex_columns(self.clusters, group, ascending=ascending, inplace=True)
+        # the helper renumbers the group column in place, bypassing the
+        # clusters setter - drop the stale group lookups by hand
+        self._group_cache = {}
+        return result
                 
         
 
@@ -840,14 +1339,13 @@ class ClusteringTribe(Tribe):
     #     if savedir:
     #         subtribes = save_cluster_results(self, groups, savedir=savedir, save_subtribes=save_subtribes)
     #         for _k, _v in subtribes.items():
-    #             self.clusters.update({_k, self.__class__(templates=_v)})
+    #             self.clusters[_k] = self.__class__(templates=_v)
     #     else:
     #         for _e, group in groups:
-    #             self.clusters.update({_e: self.__class__()})
-    #             for entry in group:
-    #                 self.clusters[_e] += self.templates[entry[1]]
+    #             self.clusters[_e] = self.__class__(
+    #                 templates=[self.templates[entry[1]] for entry in group])
     #     # Load the distance matrix into this 
-    #     self.dist_mat = np.load(Path().cwd() / 'dist_mat.npy')
+    #     self.dist_mat = np.load(Path().cwd() / 'dist_mat.npy', mmap_mode='r')
     #     self.clustering_threshold=corr_thresh
     #     self.dist_nan_fill = dist_nan_fill
     #     self.savedir = savedir
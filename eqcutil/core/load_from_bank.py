@@ -1,4 +1,5 @@
-import logging
+import os, logging
+from concurrent.futures import ProcessPoolExecutor
 
 from eqcorrscan import Tribe
 from obsplus import WaveBank, EventBank
@@ -10,6 +11,115 @@ from eqcutil.util.logging import rich_error_message
 
 Logger = logging.getLogger(__name__)
 
+
+def _make_tribe_builder(wavebank, creation_kwargs):
+    """PRIVATE METHOD
+
+    Pre-bind the invariant construction kwargs (client handle, method,
+    user extras) once so the per-event call only supplies the catalog,
+    rather than rebuilding the same kwargs dict for every event.
+
+    The returned builder constructs a fresh :class:`~eqcorrscan.Tribe`
+    per call - ``Tribe.construct`` appends to the instance it is called
+    on and returns it, so reusing one instance would hand back every
+    previously built template again on each event.
+
+    :param wavebank: open wave bank used as the construction client
+    :type wavebank: obsplus.WaveBank
+    :param creation_kwargs: kwargs for :meth:`~eqcorrscan.core.match_filter.tribe.Tribe.construct`
+    :type creation_kwargs: dict
+    :return:
+     - **builder** (*callable*) -- single-argument tribe builder
+    """
+    fixed = {_k: _v for _k, _v in creation_kwargs.items()
+             if _k not in ('catalog', 'client_id', 'method')}
+
+    def builder(catalog):
+        return Tribe().construct(catalog=catalog, client_id=wavebank,
+                                 method='from_client', **fixed)
+
+    return builder
+
+
+def _build_event_templates(event_id, eventbank, builder, pick_filt_kwargs,
+                           transfer_mapping, rename):
+    """PRIVATE METHOD
+
+    Build the templates for a single event from an already-open event
+    bank and a pre-bound tribe builder. This is the per-event body of
+    :meth:`~.generate_clustering_tribe_from_banks`, factored out so it
+    can run either in the main process or inside a worker process.
+
+    :param event_id: QuakeML event_id string to build templates for
+    :type event_id: str
+    :param eventbank: open event bank to pull metadata from
+    :type eventbank: obsplus.EventBank
+    :param builder: pre-bound tribe builder from :meth:`~._make_tribe_builder`
+    :type builder: callable
+    :param pick_filt_kwargs: kwargs passed to :meth:`~eqcutil.augment.catalog.filter_picks`
+    :type pick_filt_kwargs: dict
+    :param transfer_mapping: SEED channel ID remapping applied to picks and traces
+    :type transfer_mapping: dict
+    :param rename: should :meth:`~eqcutil.augment.template.rename_templates` be applied?
+    :type rename: bool
+    :return:
+     - **templates** (*list*) -- templates built for this event (may be empty)
+    """
+    cat = eventbank.get_events(event_id=event_id)
+    cat = apply_phase_hints(cat)
+    cat = transfer_picks(cat, transfer_mapping)
+    cat = filter_picks(cat, **pick_filt_kwargs)
+    if len(cat) == 0:
+        return []
+    if len(cat[0].picks) == 0:
+        return []
+    try:
+        tribe = builder(catalog=cat)
+    except Exception as e:
+        Logger.warning(f'{event_id} produced {rich_error_message(e)}')
+        return []
+    # Ensure template stream is merged
+    for template in tribe:
+        template.st.merge()
+    # Apply renaming if specified
+    if rename:
+        tribe = rename_templates(tribe)
+    # Apply template mapping to channels
+    # TODO: enforce rules to only allow location and component changes
+    for template in tribe:
+        for tr in template.st:
+            if tr.id in transfer_mapping.keys():
+                new_id = transfer_mapping[tr.id]
+                new_id_parts = new_id.split('.')
+                for _e, _k in enumerate(['network','station','location','channel']):
+                    if tr.stats[_k] != new_id_parts[_e]:
+                        tr.stats[_k] = new_id_parts[_e]
+    return list(tribe)
+
+
+def _build_event_templates_worker(args):
+    """PRIVATE METHOD
+
+    Process-pool worker for :meth:`~.generate_clustering_tribe_from_banks`.
+    Banks are reopened from their base paths inside the worker because
+    open obsplus bank handles are not safe to share across processes.
+
+    :param args: tuple of (event_id, wavebank_path, eventbank_path,
+        pick_filt_kwargs, creation_kwargs, transfer_mapping, rename)
+    :type args: tuple
+    :return:
+     - **templates** (*list*) -- templates built for this event (may be empty)
+    """
+    (event_id, wavebank_path, eventbank_path, pick_filt_kwargs,
+     creation_kwargs, transfer_mapping, rename) = args
+    wavebank = WaveBank(wavebank_path)
+    eventbank = EventBank(eventbank_path)
+    builder = _make_tribe_builder(wavebank, creation_kwargs)
+    return _build_event_templates(event_id, eventbank, builder,
+                                  pick_filt_kwargs, transfer_mapping,
+                                  rename)
+
+
 def generate_clustering_tribe_from_banks(
     wavebank: WaveBank,
     eventbank: EventBank,
@@ -17,26 +127,28 @@ def generate_clustering_tribe_from_banks(
     pick_filt_kwargs={'enforce_single_pick': 'preferred'},
     creation_kwargs={'method':'from_client'},
     transfer_mapping={},
-    rename=True) -> ClusteringTribe:
+    rename=True,
+    ncores=1) -> ClusteringTribe:
 
     # Compatability check for wavebank
+    # Each index is read once and reused - read_index re-scans the
+    # bank's index file from disk on every call
     if not isinstance(wavebank, WaveBank):
         raise TypeError('wavebank is not type obsplus.bank.wavebank.WaveBank')
-    elif len(wavebank.read_index()) == 0:
+    wbidx = wavebank.read_index()
+    if len(wbidx) == 0:
         raise ValueError('wavebank is empty')
-    
+
     # Ensure wavebank is mapped to creation kwargs
     creation_kwargs.update({'client_id': wavebank,
                             'method': 'from_client'})
     # Compatability check for eventbank
     if not isinstance(eventbank, EventBank):
         raise TypeError('eventbank is not type obsplus.bank.eventbank.EventBank')
-    elif len(eventbank.read_index()) == 0:
-        raise ValueError('eventbank is empty')
-    # Read indices
-    wbidx = wavebank.read_index()
     ebidx = eventbank.read_index()
-    
+    if len(ebidx) == 0:
+        raise ValueError('eventbank is empty')
+
     # Compatability check for event_ids
     if hasattr(event_ids, '__iter__'):
         ebidx_sub = ebidx[ebidx.event_id.isin(event_ids)]
@@ -44,41 +156,33 @@ def generate_clustering_tribe_from_banks(
             raise ValueError('no matches of event_ids in eventbank')
     else:
         raise AttributeError('event_ids must be an iterable comprising QuakeML event_id strings')
-    
+
+    if ncores is None:
+        ncores = os.cpu_count()
+
     # PROCESSING
-    ctr = ClusteringTribe()
-    for event_id in ebidx_sub.event_id:
-        cat = eventbank.get_events(event_id=event_id)
-        cat = apply_phase_hints(cat)
-        cat = transfer_picks(cat, transfer_mapping)
-        cat = filter_picks(cat, **pick_filt_kwargs)
-        if len(cat) == 0:
-            continue
-        if len(cat[0].picks) == 0:
-            continue
-        creation_kwargs.update({'catalog': cat})
-        try:
-            tribe = Tribe().construct(**creation_kwargs)
-        except Exception as e:
-            Logger.warning(f'{event_id} produced {rich_error_message(e)}')
-            continue
-        # Ensure template stream is merged
-        for template in tribe:
-            template.st.merge()
-        # Apply renaming if specified
-        if rename:
-            tribe = rename_templates(tribe)
-        # Apply template mapping to channels
-        # TODO: enforce rules to only allow location and component changes
-        for template in tribe:
-            for tr in template.st:
-                if tr.id in transfer_mapping.keys():
-                    new_id = transfer_mapping[tr.id]
-                    new_id_parts = new_id.split('.')
-                    for _e, _k in enumerate(['network','station','location','channel']):
-                        if tr.stats[_k] != new_id_parts[_e]:
-                            tr.stats[_k] = new_id_parts[_e]
-        ctr += tribe
-
-    return ctr
+    # Collect templates and build the ClusteringTribe once - per-event
+    # ctr += tribe repeats Tribe's append-with-dedup per template
+    all_templates = []
+    if ncores > 1:
+        # Each event is independent, so fan the per-event builds out
+        # over a process pool. Workers reopen the banks by path and the
+        # un-picklable client_id handle is stripped from the kwargs sent
+        # across the process boundary (the worker attaches its own)
+        worker_kwargs = {_k: _v for _k, _v in creation_kwargs.items()
+                         if _k != 'client_id'}
+        jobs = [(event_id, wavebank.bank_path, eventbank.bank_path,
+                 pick_filt_kwargs, worker_kwargs, transfer_mapping, rename)
+                for event_id in ebidx_sub.event_id]
+        with ProcessPoolExecutor(max_workers=ncores) as executor:
+            for templates in executor.map(_build_event_templates_worker, jobs):
+                all_templates.extend(templates)
+    else:
+        builder = _make_tribe_builder(wavebank, creation_kwargs)
+        for event_id in ebidx_sub.event_id:
+            all_templates.extend(
+                _build_event_templates(event_id, eventbank, builder,
+                                       pick_filt_kwargs, transfer_mapping,
+                                       rename))
 
+    return ClusteringTribe(templates=all_templates)
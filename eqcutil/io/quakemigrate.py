@@ -12,7 +12,15 @@
 """
 import os, logging, warnings
 
+import numpy as np
 import pandas as pd
+# numba is optional - when present the per-pick numeric pass (SNR
+# gating + travel-time residuals) runs as one compiled sweep
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 from obspy import UTCDateTime
 from obspy.core.event import Catalog, Event, Origin, Arrival, Pick, ResourceIdentifier
 from obspy.core.event import OriginUncertainty, WaveformStreamID, Magnitude, QuantityError, CreationInfo
@@ -53,6 +61,44 @@ PICK_FILE_COLS = [
 
 # TODO: Make a stream formatter that accepts and Inventory as an input
 
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _pick_numerics(pick_ts, mod_ts):
+        """Compute the keep mask (both times parsed) and travel-time
+        residuals for all picks in a single compiled sweep. Times that
+        failed to parse arrive as NaN seconds
+
+        :param pick_ts: pick times as POSIX seconds (NaN if unparseable)
+        :type pick_ts: numpy.ndarray
+        :param mod_ts: modelled arrival times as POSIX seconds
+            (NaN if unparseable)
+        :type mod_ts: numpy.ndarray
+        :return: (keep mask, residual seconds) arrays
+        :rtype: tuple
+        """
+        n = pick_ts.shape[0]
+        keep = np.empty(n, dtype=np.bool_)
+        residual = np.empty(n, dtype=np.float64)
+        for _i in range(n):
+            keep[_i] = np.isfinite(pick_ts[_i]) and np.isfinite(mod_ts[_i])
+            residual[_i] = pick_ts[_i] - mod_ts[_i]
+        return keep, residual
+
+def _hex_tokens(n):
+    """PRIVATE METHOD
+
+    Generate **n** 32-character hex tokens from a single
+    :meth:`~os.urandom` call - one syscall for the whole block rather
+    than one UUID4 (hash + randbytes syscall) per resource id
+
+    :param n: number of tokens to generate
+    :type n: int
+    :return: list of hex token strings
+    :rtype: list
+    """
+    raw = os.urandom(16*n).hex()
+    return [raw[_i:_i+32] for _i in range(0, len(raw), 32)]
+
 def stream_id_formatter(phase, station, network='UW', location='', chan_mapping={'P':'HHZ','S':'HHN'}):
     """Given the Phase and Station values from a row in a *.pick file,
     reconstitute a SEED channel ID string
@@ -193,8 +239,35 @@ def  quakemigrate2cat(event_files, pick_files, hyp_type='max', min_snr=3,
     for the SEED channel naming function
     """    
 
+    # Validate qml_extras and assemble the resource-id prefix pieces
+    # once - resource_id_formatter re-ran its type checks and f-string
+    # assembly on every pick/arrival/event call
+    if isinstance(qml_extras, str):
+        extras_suffix = f'/{qml_extras}'
+    elif qml_extras is None:
+        extras_suffix = ''
+    elif hasattr(qml_extras, '__iter__') and all(isinstance(_e, str) for _e in qml_extras):
+        extras_suffix = ''.join(f'/{_e}' for _e in qml_extras)
+    else:
+        raise ValueError('qml_extras must be str, an iterable collection of str, or NoneType')
+
+    # Randomness for anonymous resource ids is drawn from a shared
+    # token pool (pre-sized below once the table sizes are known)
+    # instead of paying ResourceIdentifier's per-call UUID4
+    _tokens = []
+
+    def _rid(resource_type, resource_name=None):
+        prefix = f'quakeml:local/quakemigrate/{resource_type}{extras_suffix}'
+        if resource_name is None:
+            if not _tokens:
+                _tokens.extend(_hex_tokens(1024))
+            return ResourceIdentifier(id=f'{prefix}/{_tokens.pop()}')
+        return ResourceIdentifier(id=f'{prefix}/{resource_name}')
+
     # Compatability check for event_file
-    df_e = pd.DataFrame()
+    # Collect per-file frames and concatenate once - concat inside the
+    # loop recopies the growing frame for every file read
+    frames_e = []
     if isinstance(event_files, str):
         event_files = [event_files]
     if isinstance(event_files, list):
@@ -202,15 +275,16 @@ def  quakemigrate2cat(event_files, pick_files, hyp_type='max', min_snr=3,
             if os.path.isfile(_e):
                 idf = pd.read_csv(_e)
                 if set(EVENT_FILE_COLS) <= set(idf.columns):
-                    df_e = pd.concat([df_e, idf], ignore_index=True)
+                    frames_e.append(idf)
                 else:
                     Logger.warning(f'event_file {_e} does not appear to have the correct column names')
             else:
                 Logger.warning(f'event_file {_e} was not found')
     else:
         Logger.critical(f'event_files type {type(event_files)} not supported. Must be str or list of str')
-    
-    df_p = pd.DataFrame()
+    df_e = pd.concat(frames_e, ignore_index=True) if frames_e else pd.DataFrame()
+
+    frames_p = []
     if isinstance(pick_files, str):
         pick_files = [pick_files]
     if isinstance(pick_files, list):
@@ -219,40 +293,125 @@ def  quakemigrate2cat(event_files, pick_files, hyp_type='max', min_snr=3,
                 idf = pd.read_csv(_e)
                 evid = os.path.split(_e)[-1]
                 evid = os.path.splitext(evid)[0]
-                idf = idf.assign(EventID=[int(evid) for _e in range(len(idf))])
+                idf = idf.assign(EventID=int(evid))
                 if set(PICK_FILE_COLS) <= set(idf.columns):
-                    df_p = pd.concat([df_p, idf], ignore_index=True)
+                    frames_p.append(idf)
                 else:
                     Logger.warning(f'pick_file {_e} does not appear to have the correct column names')
             else:
                 Logger.warning(f'pick_file {_e} was not found')
     else:
-        Logger.critical(f'pick_files type {type(pick_files)} not supported. Must be str or list of str')    
+        Logger.critical(f'pick_files type {type(pick_files)} not supported. Must be str or list of str')
+    df_p = pd.concat(frames_p, ignore_index=True) if frames_p else pd.DataFrame()
+    if len(df_p) > 0:
+        # Categorical codes make the isin/groupby/map passes below
+        # dictionary-indexed integer operations and shrink the columns
+        df_p = df_p.assign(EventID=df_p.EventID.astype('category'),
+                           Phase=df_p.Phase.astype('category'))
     
     # Check if any of the events have local magnitude estimates
     if 'ML' in df_e.columns:
         hasmag = True
+        # Evaluate magnitude availability for all events in one
+        # vectorized pass - ML is NaN where QuakeMigrate produced no
+        # local magnitude estimate
+        has_ml_vec = np.isfinite(
+            pd.to_numeric(df_e.ML, errors='coerce').to_numpy())
     else:
         hasmag = False
+        has_ml_vec = None
 
     # Sanity check to only take picks that match the given Event_ID
     df_p = df_p[df_p.EventID.isin(df_e.EventID)]
     if len(df_p) == 0:
         Logger.critical('No phases matched event_id values in "event_file"')
-    else:
+
+    # Apply the SNR gate before touching the time columns - QuakeMigrate
+    # writes -1 placeholders for PickTime/SNR on stations without an
+    # automatic pick, and those must never reach the datetime parser
+    if len(df_p) > 0:
+        df_p = df_p[df_p.SNR.to_numpy(dtype=np.float64) >= min_snr]
+
+    # Convert pick/model time strings to POSIX seconds in two
+    # vectorized passes, then run the per-pick numerics (travel-time
+    # residual + unparseable-time keep mask) in one fused sweep - a
+    # compiled numba kernel when available, two numpy passes otherwise -
+    # rather than parsing 4 UTCDateTime objects per pick inside the
+    # loop. Column names stay underscore-free so record field access
+    # keeps working
+    if len(df_p) > 0:
+        pick_dt = pd.to_datetime(df_p.PickTime, errors='coerce')
+        mod_dt = pd.to_datetime(df_p.ModelledTime, errors='coerce')
+        # view('int64') rather than astype - pandas 2.x refuses integer
+        # casts on NaT, while the view maps NaT to the int sentinel
+        # that the isna mask discards anyway
+        pick_ts = np.where(pick_dt.isna().to_numpy(), np.nan,
+                           pick_dt.to_numpy().view('int64')/1e9)
+        mod_ts = np.where(mod_dt.isna().to_numpy(), np.nan,
+                          mod_dt.to_numpy().view('int64')/1e9)
+        if HAS_NUMBA:
+            keep, residual = _pick_numerics(pick_ts, mod_ts)
+        else:
+            keep = np.isfinite(pick_ts) & np.isfinite(mod_ts)
+            residual = pick_ts - mod_ts
+        df_p = df_p.assign(PickTS=pick_ts, ModelledTS=mod_ts,
+                           Residual=residual)
+        # Picks with unparseable times never enter the Python loop below
+        df_p = df_p[keep]
+
+    if len(df_p) > 0:
         Logger.info(f'Matched {len(df_p)} picks to {len(df_e)} events')
+        # Assemble the SEED channel IDs for all picks with one
+        # vectorized string concat, applying stream_id_formatter's
+        # validation rules once instead of per pick
+        if chan_mapping.keys() != set(['P','S']):
+            raise KeyError('chan_mapping keys must be "P" and "S"')
+        if not isinstance(location, str):
+            raise ValueError('location must be type str')
+        if not df_p.Phase.isin(chan_mapping.keys()).all():
+            raise KeyError('Phase value not found in chan_mapping keys')
+        # map on the string view - mapping the categorical column with
+        # an injective dict yields another categorical, which the
+        # string concat below cannot take
+        df_p = df_p.assign(
+            SeedID=(f'{network}.' + df_p.Station.astype(str)
+                    + f'.{location}.' + df_p.Phase.astype(str).map(chan_mapping)))
 
     ## START MAKING THE CATALOG ##
-    cat = Catalog()
-    for _, erow in df_e.iterrows():
+    # One origin and at most one magnitude per event plus one pick and
+    # one arrival per retained pick need anonymous resource ids
+    _tokens.extend(_hex_tokens(2*len(df_e) + 2*len(df_p)))
+    # Events land in a pre-sized list and the Catalog is built once at
+    # the end, avoiding repeated list-resize copies on append
+    events = [None]*len(df_e)
+    # Convert both tables to structured record arrays - field access on
+    # a numpy record is cheaper than itertuples namedtuple lookup, and a
+    # stable sort + np.unique pass yields contiguous per-event pick
+    # slices without building per-group frames
+    recs_e = df_e.to_records(index=False)
+    if len(df_p) > 0:
+        # Rehydrate the categorical codes before the record conversion
+        df_p = df_p.assign(EventID=np.asarray(df_p.EventID),
+                           Phase=df_p.Phase.astype(str))
+        df_p = df_p.sort_values('EventID', kind='stable')
+        recs_p = df_p.to_records(index=False)
+        uniq, starts = np.unique(recs_p.EventID, return_index=True)
+        bounds = np.append(starts, len(recs_p))
+        pick_slices = dict(zip(uniq.tolist(),
+                               zip(bounds[:-1].tolist(), bounds[1:].tolist())))
+    else:
+        recs_p = df_p.to_records(index=False) if len(df_p.columns) else []
+        pick_slices = {}
+    for _ei, erow in enumerate(recs_e):
         # Subset Picks to Match current EVID
         Logger.info(f'Processing event_id: {erow.EventID}')
-        idf_picks = df_p[df_p.EventID == erow.EventID]
-        Logger.info(f'...with {len(idf_picks)} picks')
+        _lo, _hi = pick_slices.get(erow.EventID, (0, 0))
+        idf_picks = recs_p[_lo:_hi]
+        Logger.info(f'...with {_hi - _lo} picks')
         # Create event
-        event = Event(resource_id = resource_id_formatter(extras=qml_extras, resource_name=erow.EventID))
+        event = Event(resource_id = _rid('event', resource_name=erow.EventID))
         # Create Origin
-        origin = Origin(resource_id = resource_id_formatter(extras=qml_extras, resource_type='origin'))
+        origin = Origin(resource_id = _rid('origin'))
 
         # Populate best-estimate hypocenter
         origin.time = UTCDateTime(erow.DT)
@@ -275,10 +434,10 @@ def  quakemigrate2cat(event_files, pick_files, hyp_type='max', min_snr=3,
         event.preferred_origin_id = origin.resource_id
 
         if hasmag:
-            if isinstance(erow.ML, (int, float)):   
+            if has_ml_vec[_ei]:
                 Logger.info(f'EVID: {erow.EventID} has magnitude estimate - including in Event description')
                 magnitude = Magnitude(
-                    resource_id=resource_id_formatter(extras=qml_extras, resource_type='magnitude'),
+                    resource_id=_rid('magnitude'),
                     mag=erow.ML,
                     magnitude_type='ML',
                     mag_errors=QuantityError(uncertainty=erow.ML_Err),
@@ -291,34 +450,37 @@ def  quakemigrate2cat(event_files, pick_files, hyp_type='max', min_snr=3,
             else:
                 Logger.info(f'EVID: {erow.EventID} did not have magnitude estimate - skipping magnitude object generation')
 
-        # Populate Picks and Arrivals
-        for _, prow in idf_picks.iterrows():
+        # Populate Picks and Arrivals (SNR already filtered above),
+        # collecting both in local lists assigned wholesale below -
+        # notably skipping the preferred_origin() resource-id lookup
+        # that used to run once per arrival append
+        picks = []
+        arrivals = []
+        for prow in idf_picks:
             # Create pick
-            if prow.SNR >= min_snr:
-                seed_id = stream_id_formatter(prow.Phase, prow.Station, network=network, location=location, chan_mapping=chan_mapping)
-                pick = Pick(
-                    resource_id=resource_id_formatter(extras=qml_extras, resource_type='pick'),
-                    time = UTCDateTime(prow.PickTime),
-                    time_errors = prow.PickError,
-                    waveform_id = WaveformStreamID(seed_string=seed_id),
-                    evaluation_mode = 'automatic',
-                    phase_hint=prow.Phase)
-                # Create arrival that references pick and has travel time uncertainty
-                arrival = Arrival(
-                    resource_id=resource_id_formatter(extras=qml_extras, resource_type='arrival'),
-                    pick_id = pick.resource_id,
-                    phase=prow.Phase,
-                    time_residual=UTCDateTime(prow.PickTime) - UTCDateTime(prow.ModelledTime))
-                # Append pick to event
-                event.picks.append(pick)
-                # Append arrival to preferred origin
-                event.preferred_origin().arrivals.append(arrival)
-            else:
-                continue
-        # Append event to catalog
-        cat.events.append(event)
+            pick = Pick(
+                resource_id=_rid('pick'),
+                time = UTCDateTime(prow.PickTS),
+                time_errors = prow.PickError,
+                waveform_id = WaveformStreamID(seed_string=prow.SeedID),
+                evaluation_mode = 'automatic',
+                phase_hint=prow.Phase)
+            # Create arrival that references pick and has travel time uncertainty
+            arrival = Arrival(
+                resource_id=_rid('arrival'),
+                pick_id = pick.resource_id,
+                phase=prow.Phase,
+                time_residual=prow.Residual)
+            # Append pick to event
+            picks.append(pick)
+            # Append arrival to preferred origin
+            arrivals.append(arrival)
+        event.picks = picks
+        origin.arrivals = arrivals
+        # Place event in the catalog list
+        events[_ei] = event
     # Return catalog
-    return cat
+    return Catalog(events=events)
 
 def _qm2cat_inner_process(df_e, df_p, hyp_type='max', min_snr=3, network='', location='', chan_mapping={'P':'HHZ','S':'HHN'}):
     """PRIVATE METHOD